@@ -0,0 +1,54 @@
+"""Compare the speed of the frontmatter parsers on Web Clipper frontmatter.
+
+Run from the repository root:
+
+    python benchmarks/bench_frontmatter.py --number 20000
+"""
+import os
+import sys
+import timeit
+import argparse
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frontmatter_parser import parse_simple, load_frontmatter
+
+
+CLIPPING = '''title: "How Things Work: A Guide"
+source: "https://example.com/articles/how-things-work?utm_source=rss"
+author:
+  - "[[Jane Doe]]"
+  - "[[John Roe]]"
+published: 2024-01-02
+created: 2024-03-04
+description: "It's a long description, with commas, of what the article is about"
+tags:
+  - "clippings"
+  - "archive"'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the frontmatter parsers.")
+    parser.add_argument("--number", type=int, default=20000, help="Parses per parser")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per parser, the best is reported")
+    args = parser.parse_args()
+
+    parsers = [("yaml.safe_load", lambda: yaml.safe_load(CLIPPING))]
+    if hasattr(yaml, 'CSafeLoader'):
+        parsers.append(("yaml.load (CSafeLoader)", lambda: yaml.load(CLIPPING, Loader=yaml.CSafeLoader)))
+    else:
+        print("PyYAML was built without libyaml, skipping CSafeLoader")
+    parsers.append(("parse_simple", lambda: parse_simple(CLIPPING)))
+    parsers.append(("load_frontmatter", lambda: load_frontmatter(CLIPPING)))
+
+    baseline = None
+    for name, parse in parsers:
+        best = min(timeit.repeat(parse, number=args.number, repeat=args.repeat))
+        per_call = best / args.number * 1e6
+        baseline = baseline or per_call
+        print(f"{name:<26} {per_call:8.1f} us/parse  {baseline / per_call:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
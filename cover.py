@@ -0,0 +1,170 @@
+from functools import lru_cache
+from io import BytesIO
+from PIL import Image, ImageDraw, ImageFont
+from ebooklib import epub
+
+
+# Cover sizes and JPEG quality per reading device. Font sizes and positions are
+# designed for the 1600px wide Kindle cover and scaled to the other widths.
+COVER_PROFILES = {
+    'kindle': {'size': (1600, 2560), 'quality': 85},
+    'paperwhite': {'size': (1236, 1648), 'quality': 80},
+    'basic': {'size': (600, 800), 'quality': 75},
+}
+
+# Fonts tried in order; names are resolved by Pillow on each platform's font path.
+FONT_CANDIDATES = (
+    "Arial.ttf",
+    "arial.ttf",
+    "/System/Library/Fonts/Supplemental/Arial.ttf",
+    "/Library/Fonts/Arial.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+    "Helvetica.ttc",
+    "/System/Library/Fonts/Helvetica.ttc",
+    "DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "LiberationSans-Regular.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+)
+
+COVER_TITLE = "Articles curated from"
+MAX_PUBLICATIONS = 10
+
+
+@lru_cache(maxsize=None)
+def find_font():
+    """Return the first TrueType font from FONT_CANDIDATES that can be loaded.
+
+    The lookup runs once per process; later calls return the cached result.
+
+    Returns:
+        str: Font name or path, or None if no candidate is available.
+    """
+    for candidate in FONT_CANDIDATES:
+        try:
+            ImageFont.truetype(candidate, 10)
+            return candidate
+        except OSError:
+            continue
+    print("No TrueType font found, using Pillow's default font for the cover")
+    return None
+
+
+@lru_cache(maxsize=None)
+def load_font(size):
+    """Load the cover font at the given size, falling back to Pillow's default font.
+
+    Args:
+        size (int): Font size in pixels.
+
+    Returns:
+        ImageFont.FreeTypeFont: The loaded font.
+    """
+    font = find_font()
+    if font:
+        return ImageFont.truetype(font, size)
+    try:
+        # Pillow >= 10.1 can scale the default font
+        return ImageFont.load_default(size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def _scale(profile):
+    return COVER_PROFILES[profile]['size'][0] / 1600
+
+
+@lru_cache(maxsize=None)
+def _template(profile):
+    """Render the static part of the cover (background and title) once per profile."""
+    width, height = COVER_PROFILES[profile]['size']
+    scale = _scale(profile)
+    img = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(img)
+
+    title_font = load_font(int(100 * scale))
+    title_bbox = draw.textbbox((0, 0), COVER_TITLE, font=title_font)
+    title_width = title_bbox[2] - title_bbox[0]
+    draw.text(((width - title_width) // 2, int(200 * scale)), COVER_TITLE, font=title_font, fill='black')
+    return img
+
+
+@lru_cache(maxsize=32)
+def render_cover(publications, date_str, profile='kindle'):
+    """Render the cover as JPEG bytes.
+
+    Only the publications and the date are drawn on a copy of the cached template.
+    Results are cached by their inputs, so rebuilding a digest with the same
+    publications on the same day does not render or encode the cover again.
+
+    Args:
+        publications (tuple): Unique publication names, in display order.
+        date_str (str): Date string in Month Day, Year format.
+        profile (str, optional): Key of COVER_PROFILES. Defaults to 'kindle'.
+
+    Returns:
+        bytes: JPEG encoded cover.
+    """
+    width, height = COVER_PROFILES[profile]['size']
+    scale = _scale(profile)
+    img = _template(profile).copy()
+    draw = ImageDraw.Draw(img)
+
+    # Draw publications
+    pub_font = load_font(int(80 * scale))
+    pub_text = "\n".join(publications)
+    pub_bbox = draw.multiline_textbbox((0, 0), pub_text, font=pub_font, align='center')
+    pub_height = pub_bbox[3] - pub_bbox[1]
+    draw.multiline_text(
+        ((width - pub_bbox[2]) // 2, (height - pub_height) // 2),
+        pub_text,
+        font=pub_font,
+        fill='black',
+        align='center'
+    )
+
+    # Draw date
+    date_font = load_font(int(60 * scale))
+    date_text = f"on {date_str}"
+    date_bbox = draw.textbbox((0, 0), date_text, font=date_font)
+    date_width = date_bbox[2] - date_bbox[0]
+    draw.text(
+        ((width - date_width) // 2, height - int(300 * scale)),
+        date_text,
+        font=date_font,
+        fill='black'
+    )
+
+    img_bytes = BytesIO()
+    img.save(img_bytes, format='JPEG', quality=COVER_PROFILES[profile]['quality'], optimize=True)
+    return img_bytes.getvalue()
+
+
+def create_cover(publications, date_str, profile='kindle'):
+    """Creates a book cover with publication names and date.
+
+    Args:
+        publications (list): List of publication names
+        date_str (str): Date string in Month Day, Year format
+        profile (str, optional): Device profile from COVER_PROFILES. Defaults to 'kindle'.
+
+    Returns:
+        epub.EpubImage: Cover image item for the book
+    """
+    if profile not in COVER_PROFILES:
+        print(f"Unknown cover profile '{profile}', using 'kindle'")
+        profile = 'kindle'
+
+    # Remove duplicates while keeping the order stable, and limit to 10
+    unique_pubs = tuple(dict.fromkeys(publications))[:MAX_PUBLICATIONS]
+
+    try:
+        return epub.EpubImage(
+            uid='cover_image',
+            file_name='cover.jpg',
+            media_type='image/jpeg',
+            content=render_cover(unique_pubs, date_str, profile)
+        )
+    except Exception as e:
+        print(f"Error creating cover: {e}")
+        return None
@@ -0,0 +1,251 @@
+import time
+import random
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Statuses worth retrying: throttling and transient server/CDN errors
+RETRY_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+
+# Errors worth retrying: failed connections, timeouts and bodies cut off or garbled
+# in transit, e.g. by a connection reset halfway through the download
+RETRY_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.ContentDecodingError,
+)
+
+
+class TokenBucket:
+    """Thread-safe token bucket used to rate limit requests to a host.
+
+    Tokens are reserved rather than waited for under the lock, so the bucket can be
+    shared by several event loops and threads: reserve() returns how long the caller
+    has to sleep before its request may start.
+
+    Args:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum number of tokens, i.e. the allowed burst.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token and return the number of seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class FetchEngine:
+    """Download many URLs concurrently with per-host limits and retries.
+
+    Requests are scheduled on an asyncio event loop and performed with ``requests`` in
+    a thread pool. The number of requests in flight is capped globally and per host,
+    each host is rate limited with a token bucket, and retryable statuses,
+    connection errors and truncated downloads are retried with exponential backoff
+    and full jitter, honouring ``Retry-After`` when the server sends one.
+
+    Concurrency caps apply to each fetch_all() call; the token buckets are shared by
+    all calls on the same engine.
+
+    Args:
+        max_concurrency (int, optional): Requests in flight across all hosts. Defaults to 8.
+        per_host_concurrency (int, optional): Requests in flight per host. Defaults to 4.
+        per_host_rate (float, optional): Requests started per second per host. Defaults to 5.
+        burst (int, optional): Requests a host may receive at once before rate limiting
+            starts. Defaults to 5.
+        retries (int, optional): Retries after the first attempt. Defaults to 3.
+        backoff (float, optional): Base delay in seconds for retries. Defaults to 0.5.
+        max_backoff (float, optional): Maximum delay in seconds between retries. Defaults to 30.
+        timeout (float, optional): Timeout in seconds of a single request. Defaults to 30.
+        retry_statuses (iterable, optional): HTTP statuses that are retried.
+            Defaults to RETRY_STATUSES.
+        session (requests.Session, optional): Session used for requests, e.g. one with
+            custom headers or adapters. A new session is created if None.
+    """
+
+    def __init__(self, max_concurrency=8, per_host_concurrency=4, per_host_rate=5.0, burst=5,
+                 retries=3, backoff=0.5, max_backoff=30.0, timeout=30.0,
+                 retry_statuses=RETRY_STATUSES, session=None):
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_rate = per_host_rate
+        self.burst = burst
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.retry_statuses = frozenset(retry_statuses)
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
+        # Largest body downloaded so far, used to estimate the size of the next one
+        self._largest = None
+
+    def _bucket(self, host):
+        with self._buckets_lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.per_host_rate, self.burst)
+            return bucket
+
+    def _delay(self, attempt, response=None):
+        """Return the delay before retry number ``attempt`` (starting at 0)."""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(self.max_backoff, float(retry_after))
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def _has_room(self, memory_budget):
+        """Return True if a download as large as the largest so far fits in the budget.
+
+        Nothing is assumed to fit until the first download has finished.
+        """
+        return self._largest is not None and memory_budget.used + self._largest <= memory_budget.limit
+
+    def _get(self, url, memory_budget=None):
+        response = self.session.get(url, timeout=self.timeout)
+        # Read the body in the worker thread rather than on the event loop
+        size = len(response.content)
+        if memory_budget:
+            memory_budget.acquire(size)
+        return response
+
+    async def _fetch(self, url, executor, global_limit, host_limits, memory_budget=None):
+        host = urlparse(url).netloc
+        host_limit = host_limits.setdefault(host, asyncio.Semaphore(self.per_host_concurrency))
+        loop = asyncio.get_running_loop()
+
+        for attempt in range(self.retries + 1):
+            response = None
+            # Wait for the host's rate limit before taking a global slot, so a throttled
+            # host does not hold up requests to other hosts
+            async with host_limit:
+                await self._bucket(host).acquire()
+                async with global_limit:
+                    try:
+                        response = await loop.run_in_executor(executor, self._get, url, memory_budget)
+                    except RETRY_EXCEPTIONS as e:
+                        error = e
+                    except requests.exceptions.RequestException as e:
+                        # Invalid URLs and the like will not succeed on a retry
+                        error = e
+                        break
+                if response is not None:
+                    if response.status_code < 400:
+                        return response.content
+                    if memory_budget:
+                        memory_budget.release(len(response.content))
+                    error = f"HTTP {response.status_code}"
+                    if response.status_code not in self.retry_statuses:
+                        break
+
+            if attempt < self.retries:
+                await asyncio.sleep(self._delay(attempt, response))
+
+        print(f"Error fetching {url}: {error}")
+        return None
+
+    async def fetch_all_async(self, urls, on_result=None, memory_budget=None):
+        """Fetch all URLs in a single scheduling pass.
+
+        Args:
+            urls (iterable): URLs to fetch; duplicates are fetched once.
+            on_result (callable, optional): Called as on_result(url, data) as soon as each
+                download finishes, with data None on failure. It runs in a worker thread,
+                possibly concurrently with other calls.
+            memory_budget (memory.MemoryBudget, optional): Budget the downloaded bytes count
+                against until on_result returns. While earlier downloads are still being
+                handled, new requests wait until the budget has room for another one.
+
+        Returns:
+            dict: Response body for each URL, or None if it could not be fetched. When
+                on_result is given the bodies are only handed to it, so they can be
+                released early, and the dict maps each URL to whether it was fetched.
+        """
+        urls = list(dict.fromkeys(urls))
+        results = {}
+        if not urls:
+            return results
+
+        global_limit = asyncio.Semaphore(self.max_concurrency)
+        host_limits = {}
+        active = 0
+        loop = asyncio.get_running_loop()
+
+        async def fetch_one(url):
+            nonlocal active
+            while memory_budget and active and not self._has_room(memory_budget):
+                await asyncio.sleep(0.05)
+            active += 1
+            data = None
+            # Reserve room for the download until its actual size has been counted
+            reserved = (self._largest or 0) if memory_budget else 0
+            if reserved:
+                memory_budget.acquire(reserved)
+            try:
+                data = await self._fetch(url, executor, global_limit, host_limits, memory_budget)
+                if reserved:
+                    memory_budget.release(reserved)
+                    reserved = 0
+                if data:
+                    self._largest = max(self._largest or 0, len(data))
+                if on_result:
+                    results[url] = data is not None
+                    # Handlers may do heavy work such as decoding images, which would
+                    # hold up scheduling and rate limiting if run on the event loop
+                    await loop.run_in_executor(executor, on_result, url, data)
+                else:
+                    results[url] = data
+            finally:
+                active -= 1
+                if reserved:
+                    memory_budget.release(reserved)
+                if memory_budget and data:
+                    memory_budget.release(len(data))
+                data = None
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            await asyncio.gather(*(fetch_one(url) for url in urls))
+        return results
+
+    def fetch_all(self, urls, on_result=None, memory_budget=None):
+        """Fetch all URLs from synchronous code. See fetch_all_async."""
+        return asyncio.run(self.fetch_all_async(urls, on_result, memory_budget))
+
+    def fetch(self, url):
+        """Fetch a single URL with retries.
+
+        Returns:
+            bytes: Response body, or None if it could not be fetched.
+        """
+        return self.fetch_all([url])[url]
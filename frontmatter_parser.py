@@ -0,0 +1,150 @@
+import re
+import datetime
+import yaml
+from yaml.resolver import Resolver
+
+
+# libyaml's loader is several times faster than the pure-Python one; it is only
+# missing when PyYAML was built without libyaml.
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+_KEY_RE = re.compile(r'^([A-Za-z_][\w -]*?) *:(?: +(.*))?$')
+_ITEM_RE = re.compile(r'^( *)- +(.*)$')
+_DATE_RE = re.compile(r'^(\d{4})-(\d{2})-(\d{2})$')
+_INT_RE = re.compile(r'^[-+]?(?:0|[1-9][0-9]*)$')
+
+# Characters that start something other than a plain scalar
+_INDICATORS = set('-?:,[]{}#&*!|>\'"%@`')
+_BOOL_VALUES = {'yes': True, 'true': True, 'on': True, 'no': False, 'false': False, 'off': False}
+
+
+class _Unsupported(Exception):
+    """Raised when the frontmatter needs the full YAML parser."""
+
+
+def _plain(raw, flow=False):
+    """Return the value of a plain scalar the way PyYAML's SafeLoader would."""
+    if raw[0] in _INDICATORS or ': ' in raw or ' #' in raw or raw.endswith(':'):
+        raise _Unsupported
+    if flow and any(c in raw for c in '[]{},'):
+        raise _Unsupported
+
+    # Implicit types such as numbers, booleans and dates, resolved in PyYAML's order
+    for tag, regexp in Resolver.yaml_implicit_resolvers.get(raw[0], []):
+        if not regexp.match(raw):
+            continue
+        kind = tag.rsplit(':', 1)[-1]
+        if kind == 'null':
+            return None
+        if kind == 'bool':
+            return _BOOL_VALUES[raw.lower()]
+        if kind == 'int' and _INT_RE.match(raw):
+            return int(raw)
+        date_match = _DATE_RE.match(raw)
+        if kind == 'timestamp' and date_match:
+            return datetime.date(*map(int, date_match.groups()))
+        raise _Unsupported
+    return raw
+
+
+def _scalar(raw, flow=False):
+    """Parse a single-line scalar or flow list, raising _Unsupported for anything else."""
+    raw = raw.strip(' ')
+    if not raw:
+        if flow:
+            raise _Unsupported
+        return None
+    if raw[0] == '"':
+        inner = raw[1:-1]
+        if len(raw) < 2 or raw[-1] != '"' or '"' in inner or '\\' in inner:
+            raise _Unsupported
+        return inner
+    if raw[0] == "'":
+        inner = raw[1:-1]
+        if len(raw) < 2 or raw[-1] != "'" or "'" in inner.replace("''", ""):
+            raise _Unsupported
+        return inner.replace("''", "'")
+    if raw[0] == '[' and not flow:
+        if raw[-1] != ']':
+            raise _Unsupported
+        inner = raw[1:-1].strip(' ')
+        if not inner:
+            return []
+        return [_scalar(item, flow=True) for item in inner.split(',')]
+    return _plain(raw, flow)
+
+
+def parse_simple(text):
+    """Parse the flat frontmatter written by the Obsidian Web Clipper without PyYAML.
+
+    Supports top-level ``key: value`` pairs with plain or quoted single-line scalars,
+    ``[a, b]`` flow lists and block lists of scalars. Values are converted the way
+    yaml.safe_load would, including dates, integers, booleans and nulls.
+
+    Args:
+        text (str): Frontmatter YAML, without the '---' delimiters.
+
+    Returns:
+        dict: Parsed frontmatter, or None if the text uses YAML features outside this
+            subset and must be parsed by load_frontmatter's full YAML fallback.
+    """
+    if '\t' in text:
+        return None
+    data = {}
+    key = None
+    items = None
+    item_indent = None
+    try:
+        for line in text.split('\n'):
+            line = line.rstrip(' \r')
+            if not line or line.lstrip(' ').startswith('#'):
+                continue
+
+            key_match = _KEY_RE.match(line)
+            if key_match:
+                key = _plain(key_match.group(1))
+                if not isinstance(key, str):
+                    return None
+                value = key_match.group(2)
+                data[key] = _scalar(value) if value else None
+                # A key without a value may be followed by a block list
+                items = None if value else []
+                item_indent = None
+                continue
+
+            item_match = _ITEM_RE.match(line)
+            if item_match and items is not None:
+                indent = len(item_match.group(1))
+                if item_indent is None:
+                    item_indent = indent
+                elif indent != item_indent:
+                    return None
+                value = item_match.group(2)
+                if value[0] in '[{':
+                    return None
+                items.append(_scalar(value))
+                data[key] = items
+                continue
+
+            return None
+    except _Unsupported:
+        return None
+    return data or None
+
+
+def load_frontmatter(text):
+    """Parse frontmatter YAML, using the fast subset parser when possible.
+
+    Args:
+        text (str): Frontmatter YAML, without the '---' delimiters.
+
+    Returns:
+        The parsed frontmatter, as yaml.safe_load would return it.
+
+    Raises:
+        yaml.YAMLError: If the text needs the full parser and is not valid YAML.
+    """
+    data = parse_simple(text)
+    if data is not None:
+        return data
+    return yaml.load(text, Loader=YAML_LOADER)
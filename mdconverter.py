@@ -3,14 +3,31 @@ import re
 import datetime
 from urllib.parse import urlparse
 from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont
-import requests
+from PIL import Image
 from bs4 import BeautifulSoup
 import yaml
 import markdown
 from ebooklib import epub
 from urllib.parse import urlparse, quote  # Import quote here
-import uuid
+import hashlib
+import zipfile
+import tempfile
+import shutil
+import threading
+from cover import create_cover
+from fetcher import FetchEngine
+from frontmatter_parser import load_frontmatter
+from memory import MemoryBudget, Spool, SpooledEpubImage, SpooledEpubHtml, peak_rss
+import fnmatch
+from collections import deque
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Folders and files skipped when scanning a vault; matched against entry names and
+# paths relative to the vault root.
+DEFAULT_IGNORE_PATTERNS = ('.obsidian', '.trash', '.git', '.DS_Store')
+
+_default_fetcher = None
 
 
 def sanitize_content(content):
@@ -59,59 +76,177 @@ def sanitize_content(content):
     
     return content
 
-def process_image(src, book):
-    """Process and optimize an image for EPUB format.
+def content_id(data):
+    """Return a short, stable identifier derived from content.
+    
+    Args:
+        data (str or bytes): Content to identify.
+        
+    Returns:
+        str: First 16 hex digits of the content's SHA-256.
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def default_fetcher():
+    """Return the FetchEngine shared by builds that do not pass their own."""
+    global _default_fetcher
+    if _default_fetcher is None:
+        _default_fetcher = FetchEngine()
+    return _default_fetcher
+
+
+def optimize_image(src, image_data, memory_budget=None):
+    """Optimize downloaded image data for EPUB format.
     
-    Downloads an image from a URL, resizes it if necessary for Kindle compatibility,
-    and optimizes it for EPUB format. The image is converted to RGB and compressed
-    to reduce file size while maintaining quality.
+    Resizes the image if necessary for Kindle compatibility and optimizes it for EPUB
+    format. The image is converted to RGB and compressed to reduce file size while
+    maintaining quality.
     
     Args:
-        src (str): URL of the image to process.
-        book (epub.EpubBook): The EPUB book instance to add the image to.
+        src (str): URL the image was downloaded from.
+        image_data (bytes): Downloaded image data.
+        memory_budget (memory.MemoryBudget, optional): Budget the decoded pixels count
+            against while the image is processed.
         
     Returns:
-        str: Internal path of the processed image in the EPUB, or None if processing fails.
+        tuple: (internal_filename, image_data) for the processed image, or None if
+            processing fails.
     """
+    image_filename = os.path.basename(urlparse(src).path)
+    if not (image_filename and image_data):
+        return None
+
+    decoded_size = 0
     try:
-        encoded_src = quote(src, safe='/:')
-        response = requests.get(encoded_src, stream=True)
-        response.raise_for_status()
-        image_data = response.content
-        parsed_url = urlparse(encoded_src)
-        image_filename = os.path.basename(parsed_url.path)
-
-        if image_filename and image_data:
-            try:
-                image = Image.open(BytesIO(image_data))
+        image = Image.open(BytesIO(image_data))
+        if memory_budget:
+            # Opening only reads the header; decoding and the RGB copy hold the pixels
+            # twice. Wait for room, since images may be processed concurrently.
+            decoded_size = image.width * image.height * (len(image.getbands()) + 3)
+            memory_budget.reserve(decoded_size)
 
-                # Resize and compress for Kindle
-                image = image.convert("RGB")  # Ensure RGB for compatibility
-                width, height = image.size
+        # Resize and compress for Kindle
+        image = image.convert("RGB")  # Ensure RGB for compatibility
+        width, height = image.size
 
-                # Calculate new dimensions based on Kindle's max width (adjust as needed)
-                max_width = 768 
-                if width > max_width:
-                    new_height = int(height * (max_width / width))
-                    image = image.resize((max_width, new_height), Image.LANCZOS)  # High-quality downsampling
+        # Calculate new dimensions based on Kindle's max width (adjust as needed)
+        max_width = 768 
+        if width > max_width:
+            new_height = int(height * (max_width / width))
+            image = image.resize((max_width, new_height), Image.LANCZOS)  # High-quality downsampling
 
-                img_byte_arr = BytesIO()
-                image.save(img_byte_arr, format='JPEG', quality=75, optimize=True) # Use JPEG for smaller file size. Adjust quality as needed.
-                image_data = img_byte_arr.getvalue()
+        img_byte_arr = BytesIO()
+        image.save(img_byte_arr, format='JPEG', quality=75, optimize=True) # Use JPEG for smaller file size. Adjust quality as needed.
+        image_data = img_byte_arr.getvalue()
 
-            except Exception as e:
-                print(f"Error processing image {encoded_src}: {e}")
-                return None
-            
-            image_uuid = str(uuid.uuid4())
-            internal_filename = f"images/{image_uuid}"
-            image_id = image_uuid
-            img = epub.EpubImage(file_name=internal_filename, media_type='image/jpeg', content=image_data)
-            img.id = image_id
-            book.add_item(img)
-            return internal_filename
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching image {encoded_src}: {e}")
+    except Exception as e:
+        print(f"Error processing image {src}: {e}")
+        return None
+    finally:
+        if decoded_size:
+            memory_budget.unreserve(decoded_size)
+
+    internal_filename = f"images/{content_id(image_data)}.jpg"
+    return internal_filename, image_data
+
+
+def fetch_image(src, fetcher=None):
+    """Download and optimize an image for EPUB format without adding it to a book.
+    
+    Args:
+        src (str): URL of the image to process.
+        fetcher (FetchEngine, optional): Engine used for the download. Defaults to the
+            shared engine.
+        
+    Returns:
+        tuple: (internal_filename, image_data) for the processed image, or None if
+            processing fails.
+    """
+    encoded_src = quote(src, safe='/:')
+    image_data = (fetcher or default_fetcher()).fetch(encoded_src)
+    return optimize_image(encoded_src, image_data)
+
+
+def fetch_images(urls, fetcher=None, on_image=None, memory_budget=None):
+    """Download and optimize many images in one scheduling pass.
+    
+    Each image is optimized and handed to on_image as soon as its download finishes,
+    so the downloaded data does not have to be kept until all images are done.
+    
+    Args:
+        urls (iterable): Encoded image URLs.
+        fetcher (FetchEngine, optional): Engine used for the downloads. Defaults to the
+            shared engine.
+        on_image (callable, optional): Called as on_image(internal_filename, image_data)
+            for every optimized image.
+        memory_budget (memory.MemoryBudget, optional): Budget downloads and decoded
+            images count against.
+        
+    Returns:
+        dict: Internal path of each image in the EPUB, or None if it failed.
+    """
+    internal_paths = {}
+    # Images are optimized in the fetcher's worker threads; on_image is called one at a time
+    lock = threading.Lock()
+
+    def handle(url, data):
+        result = optimize_image(url, data, memory_budget)
+        internal_paths[url] = result[0] if result else None
+        if result and on_image:
+            with lock:
+                on_image(*result)
+
+    (fetcher or default_fetcher()).fetch_all(urls, handle, memory_budget)
+    return internal_paths
+
+
+def add_image(book, internal_filename, image_data, spool=None):
+    """Add a processed image to the book.
+    
+    Args:
+        book (epub.EpubBook): The EPUB book instance to add the image to.
+        internal_filename (str): Internal path of the image in the EPUB.
+        image_data (bytes): JPEG encoded image data.
+        spool (memory.Spool, optional): Keep the image data on disk until the book is
+            written instead of in memory.
+        
+    Returns:
+        epub.EpubImage: The image item added to the book.
+    """
+    # Images are named by content, so an image used by several notes is stored once
+    existing = book.get_item_with_href(internal_filename)
+    if existing:
+        return existing
+
+    image_class = partial(SpooledEpubImage, spool) if spool else epub.EpubImage
+    img = image_class(file_name=internal_filename, media_type='image/jpeg', content=image_data)
+    img.id = f"image_{os.path.splitext(os.path.basename(internal_filename))[0]}"
+    book.add_item(img)
+    return img
+
+
+def process_image(src, book, fetcher=None):
+    """Process and optimize an image for EPUB format.
+    
+    Downloads and optimizes the image with fetch_image and adds it to the book.
+    
+    Args:
+        src (str): URL of the image to process.
+        book (epub.EpubBook): The EPUB book instance to add the image to.
+        fetcher (FetchEngine, optional): Engine used for the download. Defaults to the
+            shared engine.
+        
+    Returns:
+        str: Internal path of the processed image in the EPUB, or None if processing fails.
+    """
+    result = fetch_image(src, fetcher)
+    if result:
+        internal_filename, image_data = result
+        add_image(book, internal_filename, image_data)
+        return internal_filename
     return None
 
 
@@ -131,7 +266,7 @@ def parse_frontmatter(content):
         frontmatter_match = re.search(r"^---\n(.*?)\n---", content, re.DOTALL | re.MULTILINE)
         if frontmatter_match:
             frontmatter_yaml = frontmatter_match.group(1)
-            frontmatter = yaml.safe_load(frontmatter_yaml)
+            frontmatter = load_frontmatter(frontmatter_yaml)
             return frontmatter
         else:
             print("No frontmatter found.")
@@ -164,14 +299,11 @@ def append_tag_to_frontmatter(f, new_tag):
         return False
 
     frontmatter_yaml = frontmatter_match.group(1)
-    frontmatter = yaml.safe_load(frontmatter_yaml)
-    original_frontmatter = frontmatter.copy()
-    print("ORIGINAL: " + yaml.dump(original_frontmatter))
+    frontmatter = load_frontmatter(frontmatter_yaml)
 
     if frontmatter:
-        tags = frontmatter.get('tags', []).copy()
-        if isinstance(tags, str):  # Handle comma-separated string tags
-            tags = [t.strip() for t in tags.split(',')]
+        print("ORIGINAL: " + yaml.dump(frontmatter))
+        tags = list(get_tags(frontmatter))  # Handles comma-separated string tags
 
         if new_tag not in tags:
             tags.append(new_tag)
@@ -201,7 +333,287 @@ def append_tag_to_frontmatter(f, new_tag):
         return False
 
 
-def create_chapter(filepath, book, tag_name, tag_criteria='does not contain'):
+def _is_ignored(name, relpath, ignore_patterns):
+    return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relpath, pattern)
+               for pattern in ignore_patterns)
+
+
+def _scan_directory(path, relpath, ignore_patterns, symlinks):
+    """Scan a single directory.
+    
+    Returns:
+        tuple: (files, subdirectories) where files is a list of (filepath, mtime) and
+            subdirectories a list of (path, relpath, key) to scan next. key identifies the
+            folder as (st_dev, st_ino) when folder symlinks are followed, else None.
+    """
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                entry_relpath = f"{relpath}/{entry.name}" if relpath else entry.name
+                if _is_ignored(entry.name, entry_relpath, ignore_patterns):
+                    continue
+                try:
+                    is_symlink = entry.is_symlink()
+                    if entry.is_dir():
+                        if is_symlink and symlinks != 'all':
+                            continue
+                        key = None
+                        if symlinks == 'all':
+                            # DirEntry.stat() has no inode number on Windows, os.stat() does
+                            st = os.stat(entry.path)
+                            key = (st.st_dev, st.st_ino)
+                        subdirs.append((entry.path, entry_relpath, key))
+                    elif entry.name.endswith(".md") and entry.is_file():
+                        if is_symlink and symlinks == 'none':
+                            continue
+                        files.append((entry.path, entry.stat().st_mtime))
+                except OSError as e:
+                    print(f"Error reading {entry.path}: {e}")
+    except OSError as e:
+        print(f"Error scanning {path}: {e}")
+    return files, subdirs
+
+
+def discover_markdown_files(markdown_folder, recursive=True, ignore_patterns=None, symlinks='files', scan_workers=4):
+    """Find the markdown files in a vault together with their modification times.
+    
+    Directories are read with os.scandir and the stat results are reused, so no extra
+    os.path.getmtime call is needed per file. Subdirectories are scanned in parallel,
+    which hides the per-directory latency of network or iCloud-backed folders.
+    
+    Args:
+        markdown_folder (str): Path to folder containing markdown files.
+        recursive (bool, optional): Also scan subfolders. Defaults to True.
+        ignore_patterns (iterable, optional): Glob patterns of files and folders to skip,
+            matched against names and paths relative to markdown_folder. Defaults to
+            DEFAULT_IGNORE_PATTERNS.
+        symlinks (str, optional): Symlink policy - 'none' skips all symlinks, 'files' follows
+            symlinked files only and 'all' also follows symlinked folders. Defaults to 'files'.
+        scan_workers (int, optional): Number of folders scanned concurrently. Defaults to 4.
+        
+    Returns:
+        list: (filepath, mtime) tuples sorted by path.
+        
+    Raises:
+        ValueError: If the symlink policy is unknown.
+    """
+    if symlinks not in ('none', 'files', 'all'):
+        raise ValueError(f"Unknown symlink policy: {symlinks}")
+    if ignore_patterns is None:
+        ignore_patterns = DEFAULT_IGNORE_PATTERNS
+    ignore_patterns = tuple(ignore_patterns)
+
+    # Followed folder symlinks can form cycles, so remember the folders already visited
+    visited = set()
+    if symlinks == 'all':
+        root_stat = os.stat(markdown_folder)
+        visited.add((root_stat.st_dev, root_stat.st_ino))
+    md_files = []
+
+    with ThreadPoolExecutor(max_workers=max(1, scan_workers)) as executor:
+        pending = {executor.submit(_scan_directory, markdown_folder, '', ignore_patterns, symlinks)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                md_files.extend(files)
+                if not recursive:
+                    continue
+                for path, relpath, key in subdirs:
+                    if key is not None:
+                        if key in visited:
+                            continue
+                        visited.add(key)
+                    pending.add(executor.submit(_scan_directory, path, relpath, ignore_patterns, symlinks))
+
+    md_files.sort()
+    return md_files
+
+
+def get_tags(frontmatter):
+    """Return the tags of a note as a list.
+    
+    Args:
+        frontmatter (dict): Parsed frontmatter of the note.
+        
+    Returns:
+        list: Tags, whether they were stored as a list or a comma-separated string.
+    """
+    tags = frontmatter.get('tags', []) or []
+    if isinstance(tags, str):
+        tags = [t.strip() for t in tags.split(',')]
+    return tags
+
+
+def matches_tag_criteria(frontmatter, tag_name, tag_criteria='does not contain'):
+    """Check a note's frontmatter against the tag criteria.
+    
+    Args:
+        frontmatter (dict): Parsed frontmatter of the note.
+        tag_name (str): Tag to filter files by.
+        tag_criteria (str, optional): How to filter by tag - 'contains' or 'does not contain'.
+            Defaults to 'does not contain'.
+            
+    Returns:
+        bool: True if the note should be included in the book.
+    """
+    # Frontmatter such as a lone line of text parses to something other than a mapping
+    if not isinstance(frontmatter, dict):
+        return False
+    tag_match = tag_name in get_tags(frontmatter)
+    return (tag_criteria == 'contains' and tag_match) or \
+           (tag_criteria == 'does not contain' and not tag_match)
+
+
+def get_publication(frontmatter):
+    """Return the publication (source host) of a note, or "Unknown"."""
+    url = frontmatter.get('source', '')
+    return urlparse(url).netloc if url else "Unknown"
+
+
+def prepare_chapter(filepath, content, frontmatter):
+    """Convert a Markdown note to chapter HTML and list the images it needs.
+    
+    Args:
+        filepath (str): Path to the Markdown file.
+        content (str): The full content of the Markdown file.
+        frontmatter (dict): Parsed frontmatter of the note.
+        
+    Returns:
+        dict: Prepared chapter with 'title', 'html', 'image_urls' and 'publication'
+            keys, to be completed by finish_chapter.
+    """
+    title = frontmatter.get('title', 'Untitled')
+    author = frontmatter.get('author') or 'Untitled'
+    if isinstance(author, str):
+        author = [author]
+    authors = [re.sub(r'[\[\]]', '', str(a)).strip() for a in author]
+    author_string = ", ".join(authors)
+    publication_date = frontmatter.get('published', '')
+    publication = get_publication(frontmatter)
+
+    # Extract content after the frontmatter
+    content_parts = content.split("---", 2)
+    markdown_content = content_parts[-1].strip() if len(content_parts) > 2 else ""
+
+    chapter_content = f"<h1>{title}</h1><p>{author_string}, {publication}, {publication_date}</p>\n{markdown_content}"
+    html_content = markdown.markdown(chapter_content)
+    html_content_utf8 = html_content.encode('utf-8', 'ignore').decode('utf-8')
+    soup = BeautifulSoup(html_content_utf8, 'html.parser')
+
+    image_urls = []
+    for img in soup.find_all('img'):
+        src = img.get('src')
+        if src and src.startswith("http"):
+            image_urls.append(quote(src, safe='/:'))
+    soup.decompose()
+
+    return {
+        'title': title,
+        'html': html_content_utf8,
+        'image_urls': image_urls,
+        'publication': publication,
+    }
+
+
+def finish_chapter(prepared, image_paths):
+    """Point a prepared chapter's images at their EPUB paths and sanitize the HTML.
+    
+    Args:
+        prepared (dict): Chapter returned by prepare_chapter.
+        image_paths (dict): Internal path for each URL in prepared['image_urls'], or None
+            for images that could not be fetched, as returned by fetch_images.
+        
+    Returns:
+        dict: Rendered chapter with 'title', 'file_name', 'content', 'images' and
+            'publication' keys. 'images' is empty; the images are added separately.
+    """
+    soup = BeautifulSoup(prepared['html'], 'html.parser')
+
+    for img in soup.find_all('img'):
+        src = img.get('src')
+        internal_path = image_paths.get(quote(src, safe='/:')) if src and src.startswith("http") else None
+        if internal_path:
+            img['src'] = internal_path
+        else:
+            img.decompose()
+
+    # Sanitize the final HTML content
+    content = sanitize_content(str(soup))
+    # Break the tree's reference cycles now rather than waiting for the garbage collector
+    soup.decompose()
+    return {
+        'title': prepared['title'],
+        'file_name': f"{content_id(content)}.xhtml",
+        'content': content,
+        'images': [],
+        'publication': prepared['publication'],
+    }
+
+
+def render_chapter(filepath, content, frontmatter, fetcher=None):
+    """Render a Markdown note into chapter HTML without touching a book.
+    
+    Converts the note body to HTML, downloads and optimizes its images and sanitizes
+    the result. The rendered chapter can later be attached to any book with
+    add_rendered_chapter, which allows notes to be rendered ahead of time.
+    
+    Args:
+        filepath (str): Path to the Markdown file.
+        content (str): The full content of the Markdown file.
+        frontmatter (dict): Parsed frontmatter of the note.
+        fetcher (FetchEngine, optional): Engine used to download images. Defaults to the
+            shared engine.
+        
+    Returns:
+        dict: Rendered chapter with 'title', 'file_name', 'content', 'images' and
+            'publication' keys.
+    """
+    prepared = prepare_chapter(filepath, content, frontmatter)
+    images = []
+    image_paths = fetch_images(prepared['image_urls'], fetcher, lambda *image: images.append(image))
+    rendered = finish_chapter(prepared, image_paths)
+    rendered['images'] = images
+    return rendered
+
+
+def add_rendered_chapter(book, rendered, spool=None):
+    """Add a chapter produced by render_chapter, and its images, to the book.
+    
+    Args:
+        book (epub.EpubBook): The EPUB book instance to add the chapter to.
+        rendered (dict): Chapter returned by render_chapter.
+        spool (memory.Spool, optional): Keep the chapter and image content on disk until
+            the book is written instead of in memory.
+        
+    Returns:
+        epub.EpubHtml: The chapter added to the book.
+    """
+    for internal_filename, image_data in rendered['images']:
+        add_image(book, internal_filename, image_data, spool)
+
+    # Chapters are named by content, so only notes with identical content collide
+    file_name = rendered['file_name']
+    base, ext = os.path.splitext(file_name)
+    counter = 1
+    while book.get_item_with_href(file_name):
+        counter += 1
+        file_name = f"{base}_{counter}{ext}"
+
+    chapter_class = partial(SpooledEpubHtml, spool) if spool else epub.EpubHtml
+    chapter = chapter_class(
+        uid=f"chapter_{os.path.splitext(file_name)[0]}",
+        title=rendered['title'],
+        file_name=file_name,
+        content=rendered['content']
+    )
+    book.add_item(chapter)
+    return chapter
+
+
+def create_chapter(filepath, book, tag_name, tag_criteria='does not contain', fetcher=None):
     """Create an EPUB chapter from a Markdown file.
     
     Processes a Markdown file into an EPUB chapter, including metadata from frontmatter,
@@ -214,6 +626,8 @@ def create_chapter(filepath, book, tag_name, tag_criteria='does not contain'):
         tag_name (str): Tag to filter files by.
         tag_criteria (str, optional): How to filter by tag - 'contains' or 'does not contain'.
             Defaults to 'does not contain'.
+        fetcher (FetchEngine, optional): Engine used to download images. Defaults to the
+            shared engine.
             
     Returns:
         epub.EpubHtml: The created chapter, or None if creation fails.
@@ -222,158 +636,168 @@ def create_chapter(filepath, book, tag_name, tag_criteria='does not contain'):
         content = f.read()
         frontmatter = parse_frontmatter(content)
 
-        if frontmatter:
-            # Handle tags whether they are a list or comma-separated string
-            tags = frontmatter.get('tags', [])
-            if isinstance(tags, str):
-                tags = [t.strip() for t in tags.split(',')]
-            
-            # Process files based on tag criteria
-            tag_match = tag_name in tags
-            if (tag_criteria == 'contains' and tag_match) or \
-               (tag_criteria == 'does not contain' and not tag_match):
-                title = frontmatter.get('title', 'Untitled')
-                author = frontmatter.get('author', 'Untitled')
-                authors = [re.sub(r'[\[\]]', '', a).strip() for a in author]
-                author_string = ", ".join(authors)
-                publication_date = frontmatter.get('published', '')
-                url = frontmatter.get('source', '')
-                publication = urlparse(url).netloc if url else "Unknown"
-
-                # Extract content after the frontmatter
-                content_parts = content.split("---", 2)
-                markdown_content = content_parts[-1].strip() if len(content_parts) > 2 else ""
-
-                chapter_content = f"<h1>{title}</h1><p>{author_string}, {publication}, {publication_date}</p>\n{markdown_content}"
-                html_content = markdown.markdown(chapter_content)
-                html_content_utf8 = html_content.encode('utf-8', 'ignore').decode('utf-8')
-                soup = BeautifulSoup(html_content_utf8, 'html.parser')
-                
-                for img in soup.find_all('img'):
-                    src = img.get('src')
-                    if src and src.startswith("http"):
-                        internal_path = process_image(src, book)
-                        if internal_path:
-                            img['src'] = internal_path
-                        else:
-                            img.decompose()
-                    else:
-                        img.decompose()
-                
-                # Sanitize the final HTML content
-                sanitized_html = sanitize_content(str(soup))
-                chapter = epub.EpubHtml(
-                    title=title,
-                    file_name=f"{os.path.splitext(os.path.basename(filepath))[0]}.xhtml",
-                    content=sanitized_html
-                )
-                if chapter:
-                    book.add_item(chapter)
-                    append_tag_to_frontmatter(f, "archive")
-                    return chapter
+        # Process files based on tag criteria
+        if matches_tag_criteria(frontmatter, tag_name, tag_criteria):
+            rendered = render_chapter(filepath, content, frontmatter, fetcher)
+            chapter = add_rendered_chapter(book, rendered)
+            if chapter:
+                append_tag_to_frontmatter(f, "archive")
+                return chapter
     return None
 
 
-def create_cover(publications, date_str):
-    """Creates a book cover with publication names and date.
+def new_book(build_date=None, identifier=None):
+    """Create an empty EPUB book with the default title, language, TOC and spine.
     
     Args:
-        publications (list): List of publication names
-        date_str (str): Date string in Month Day, Year format
+        build_date (datetime.date, optional): Date shown in the title. Defaults to today.
+        identifier (str, optional): Unique identifier of the book. ebooklib generates a
+            random one if None, which makes every build byte-different.
     
     Returns:
-        epub.EpubImage: Cover image item for the book
+        epub.EpubBook: The new book.
     """
-    # Create a new image with a white background
-    width = 1600  # Standard Kindle cover width
-    height = 2560  # Standard Kindle cover height
-    img = Image.new('RGB', (width, height), 'white')
-    draw = ImageDraw.Draw(img)
+    build_date = build_date or datetime.date.today()
+    book = epub.EpubBook()
+    if identifier:
+        book.set_identifier(identifier)
+    book.set_title(f"Articles {build_date.strftime('%Y-%b-%d')}")
+    book.set_language('en')
+
+    # Add default TOC and spine
+    book.toc = []
+    book.spine = ['nav']
+    return book
+
+
+# Frontmatter fields that appear in the book; tags only select notes
+CHAPTER_FIELDS = ('title', 'author', 'source', 'published')
+
+
+def note_hash(content, frontmatter):
+    """Hash the parts of a note that end up in its chapter.
     
-    try:
-        # Load fonts (using default if custom font fails)
-        try:
-            title_font = ImageFont.truetype("Arial", 100)
-            pub_font = ImageFont.truetype("Arial", 80)
-            date_font = ImageFont.truetype("Arial", 60)
-        except:
-            title_font = ImageFont.load_default()
-            pub_font = ImageFont.load_default()
-            date_font = ImageFont.load_default()
-
-        # Draw title
-        title = "Articles curated from"
-        title_bbox = draw.textbbox((0, 0), title, font=title_font)
-        title_width = title_bbox[2] - title_bbox[0]
-        draw.text(((width - title_width) // 2, 200), title, font=title_font, fill='black')
-
-        # Draw publications (up to 10)
-        unique_pubs = list(set(publications))[:10]  # Remove duplicates and limit to 10
-        pub_text = "\n".join(unique_pubs)
-        pub_bbox = draw.multiline_textbbox((0, 0), pub_text, font=pub_font, align='center')
-        pub_height = pub_bbox[3] - pub_bbox[1]
-        draw.multiline_text(
-            ((width - pub_bbox[2]) // 2, (height - pub_height) // 2),
-            pub_text,
-            font=pub_font,
-            fill='black',
-            align='center'
-        )
-
-        # Draw date
-        date_text = f"on {date_str}"
-        date_bbox = draw.textbbox((0, 0), date_text, font=date_font)
-        date_width = date_bbox[2] - date_bbox[0]
-        draw.text(
-            ((width - date_width) // 2, height - 300),
-            date_text,
-            font=date_font,
-            fill='black'
-        )
-
-        # Save to bytes
-        img_bytes = BytesIO()
-        img.save(img_bytes, format='JPEG', quality=95)
+    Tags are left out, so tagging a note as archived after a build does not make the
+    book look out of date.
+    
+    Args:
+        content (str): The full content of the Markdown file.
+        frontmatter (dict): Parsed frontmatter of the note.
         
-        # Create cover image item
-        cover_image = epub.EpubImage(
-            uid='cover_image',
-            file_name='cover.jpg',
-            media_type='image/jpeg',
-            content=img_bytes.getvalue()
-        )
+    Returns:
+        str: Hex digest of the note's body and chapter fields.
+    """
+    digest = hashlib.sha256()
+    for field in CHAPTER_FIELDS:
+        digest.update(f"{field}\0{frontmatter.get(field)!r}\0".encode('utf-8'))
+    # Same split as prepare_chapter
+    content_parts = content.split("---", 2)
+    body = content_parts[-1].strip() if len(content_parts) > 2 else ""
+    digest.update(body.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def build_identifier(files, options):
+    """Derive a book identifier from the notes that go into it and the build options.
+    
+    Args:
+        files (list): (relative path, content hash) of each note, in book order.
+        options (iterable): Build options that change the output.
         
-        return cover_image
+    Returns:
+        str: URN identifying this exact input set.
+    """
+    digest = hashlib.sha256()
+    for value in options:
+        digest.update(f"{value}\0".encode('utf-8'))
+    for relpath, content_hash in files:
+        digest.update(f"{relpath}\0{content_hash}\0".encode('utf-8'))
+    return f"urn:sha256:{digest.hexdigest()}"
+
+
+def read_epub_identifier(path):
+    """Return the identifier of an existing EPUB, or None if it cannot be read."""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            for name in zf.namelist():
+                if name.endswith('.opf'):
+                    opf = zf.read(name).decode('utf-8')
+                    match = re.search(r'<dc:identifier[^>]*>([^<]+)</dc:identifier>', opf)
+                    return match.group(1) if match else None
+    except (OSError, zipfile.BadZipFile, UnicodeDecodeError):
+        return None
+    return None
+
+
+def find_built_book(output_path, identifier):
+    """Return an existing EPUB with the given identifier, or None.
+    
+    Besides output_path, the timestamped copies prepare_output_path creates next to it
+    are checked, newest first, since the latest build may have been written to one.
+    
+    Args:
+        output_path (str): Requested path of the EPUB file.
+        identifier (str): Identifier of the book, see build_identifier.
         
-    except Exception as e:
-        print(f"Error creating cover: {e}")
+    Returns:
+        str: Path of the matching EPUB, or None if the book has not been built yet.
+    """
+    base, ext = os.path.splitext(output_path)
+    pattern = re.compile(re.escape(os.path.basename(base)) + r'_\d{8}_\d{6}' + re.escape(ext) + '$')
+    output_dir = os.path.dirname(output_path) or '.'
+    try:
+        copies = sorted((name for name in os.listdir(output_dir) if pattern.match(name)), reverse=True)
+    except OSError:
         return None
+    for path in [output_path] + [os.path.join(output_dir, name) for name in copies]:
+        if os.path.exists(path) and read_epub_identifier(path) == identifier:
+            return path
+    return None
 
 
-def create_epub(markdown_folder, tag_name, output_path, tag_criteria='does not contain', num_entries=None, selection_mode='newest', progress_callback=None):
-    """Create an EPUB book from Markdown files.
+def normalize_epub(src, dst, build_date):
+    """Copy an EPUB with fixed entry timestamps and attributes.
     
-    Creates an EPUB book from a collection of Markdown files, filtering by tags and
-    applying selection criteria. The book includes proper navigation, metadata, and
-    formatted content.
+    Entries keep the order ebooklib wrote them in, which is stable once the book's
+    items are sorted. The mimetype entry stays uncompressed as the EPUB format
+    requires, and every timestamp is set to build_date, so identical books are
+    byte-identical.
     
     Args:
-        markdown_folder (str): Path to folder containing markdown files.
-        tag_name (str): Tag to filter files by.
-        output_path (str): Path to save the EPUB file.
-        tag_criteria (str, optional): How to filter by tag - 'contains' or 'does not contain'.
-            Defaults to 'does not contain'.
-        num_entries (int, optional): Number of entries to include. If None, includes all entries.
-        selection_mode (str, optional): How to select entries - 'random', 'newest', or 'oldest'.
-            Defaults to 'newest'.
+        src (str): EPUB written by ebooklib.
+        dst (str): Path of the normalized EPUB.
+        build_date (datetime.date): Date used for every entry's timestamp.
+    """
+    date_time = (max(build_date.year, 1980), build_date.month, build_date.day, 0, 0, 0)
+    with zipfile.ZipFile(src) as zin, zipfile.ZipFile(dst, 'w') as zout:
+        for name in zin.namelist():
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.create_system = 3
+            info.external_attr = 0o644 << 16
+            if name == 'mimetype':
+                info.compress_type = zipfile.ZIP_STORED
+            else:
+                info.compress_type = zipfile.ZIP_DEFLATED
+            with zin.open(name) as fin, zout.open(info, 'w') as fout:
+                shutil.copyfileobj(fin, fout)
+
+
+def prepare_output_path(output_path, progress_callback=None):
+    """Create the output directory and pick a filename that does not overwrite a previous book.
+    
+    Args:
+        output_path (str): Requested path of the EPUB file.
         progress_callback (callable, optional): Function to call with progress updates.
-            
+        
+    Returns:
+        str: Path the EPUB should be written to.
+        
     Raises:
-        ValueError: If no files match the tag criteria or if output directory creation fails.
+        ValueError: If output directory creation fails.
     """
     # Create output directory if it doesn't exist
     output_dir = os.path.dirname(output_path)
-    if not os.path.exists(output_dir):
+    if output_dir and not os.path.exists(output_dir):
         try:
             os.makedirs(output_dir)
             if progress_callback:
@@ -389,50 +813,132 @@ def create_epub(markdown_folder, tag_name, output_path, tag_criteria='does not c
         output_path = f"{base}_{timestamp}{ext}"
         if progress_callback:
             progress_callback(f"Output file already exists. Using new filename: {os.path.basename(output_path)}")
+    return output_path
 
-    book = epub.EpubBook()
-    book.set_title(f"Articles {datetime.date.today().strftime('%Y-%b-%d')}")
-    book.set_language('en')
 
-    # Add default TOC and spine
-    book.toc = []
-    book.spine = ['nav']
+def write_book(book, publications, output_path, progress_callback=None, cover_profile='kindle', build_date=None):
+    """Add the cover and navigation to a book and write it to disk.
+    
+    The EPUB is written with a stable item order and fixed timestamps, so the same
+    book built on the same date is byte-identical.
+    
+    Args:
+        book (epub.EpubBook): Book whose chapters have already been added.
+        publications (list): Publication names shown on the cover.
+        output_path (str): Path to save the EPUB file.
+        progress_callback (callable, optional): Function to call with progress updates.
+        cover_profile (str, optional): Device profile of the cover, see cover.COVER_PROFILES.
+            Defaults to 'kindle'.
+        build_date (datetime.date, optional): Date shown on the cover and used for the
+            EPUB's timestamps. Defaults to today.
+    """
+    build_date = build_date or datetime.date.today()
 
-    # Collect publications while processing files
-    publications = []
+    # Create and add cover; set_cover adds the image item itself
+    date_str = build_date.strftime('%B %d, %Y')
+    cover = create_cover(publications, date_str, cover_profile)
+    if cover:
+        book.set_cover("cover.jpg", cover.content)
+        if progress_callback:
+            progress_callback("Added cover image")
+
+    # Add navigation files
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+
+    # Set the author
+    book.add_author("Articles")
+
+    # Images are added as their downloads finish, so order the manifest by name
+    book.items.sort(key=lambda item: item.file_name)
+
+    try:
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        with tempfile.TemporaryDirectory(dir=output_dir) as tmp_dir:
+            tmp_path = os.path.join(tmp_dir, 'book.epub')
+            mtime = datetime.datetime.combine(build_date, datetime.time())
+            epub.write_epub(tmp_path, book, {'mtime': mtime})
+            normalize_epub(tmp_path, output_path, build_date)
+        if progress_callback:
+            progress_callback(f"Successfully created EPUB at {output_path}")
+        print(f"EPUB created successfully at {output_path}")
+    except Exception as e:
+        if progress_callback:
+            progress_callback(f"Error creating EPUB: {str(e)}")
+        print(f"Error creating EPUB: {e}")
+        raise
+
+
+def create_epub(markdown_folder, tag_name, output_path, tag_criteria='does not contain', num_entries=None, selection_mode='newest', progress_callback=None,
+                recursive=True, ignore_patterns=None, symlinks='files', scan_workers=4, cover_profile='kindle',
+                fetcher=None, memory_budget=None, build_date=None):
+    """Create an EPUB book from Markdown files.
+    
+    Creates an EPUB book from a collection of Markdown files, filtering by tags and
+    applying selection criteria. The book includes proper navigation, metadata, and
+    formatted content.
+    
+    Args:
+        markdown_folder (str): Path to folder containing markdown files.
+        tag_name (str): Tag to filter files by.
+        output_path (str): Path to save the EPUB file.
+        tag_criteria (str, optional): How to filter by tag - 'contains' or 'does not contain'.
+            Defaults to 'does not contain'.
+        num_entries (int, optional): Number of entries to include. If None, includes all entries.
+        selection_mode (str, optional): How to select entries - 'random', 'newest', or 'oldest'.
+            Defaults to 'newest'.
+        progress_callback (callable, optional): Function to call with progress updates.
+        recursive (bool, optional): Also include notes in subfolders. Defaults to True.
+        ignore_patterns (iterable, optional): Glob patterns of files and folders to skip.
+            Defaults to DEFAULT_IGNORE_PATTERNS.
+        symlinks (str, optional): Symlink policy - 'none', 'files' or 'all'. Defaults to 'files'.
+        scan_workers (int, optional): Number of folders scanned concurrently. Defaults to 4.
+        cover_profile (str, optional): Device profile of the cover - 'kindle', 'paperwhite'
+            or 'basic'. Defaults to 'kindle'.
+        fetcher (FetchEngine, optional): Engine used to download images. Defaults to the
+            shared engine.
+        memory_budget (int, optional): Approximate number of bytes of notes and downloaded
+            images held in memory at once. Chapters are then converted in groups, and
+            chapter and image content is kept in a temporary folder until the EPUB is
+            written. If None, all selected notes are converted in one group in memory.
+        build_date (datetime.date, optional): Date shown in the title and on the cover and
+            used for the EPUB's timestamps. Defaults to today.
+            
+    Returns:
+        str: Path of the EPUB. If output_path, or a timestamped copy of it, already holds
+            the book built from the same notes and options, that file is returned without
+            building again.
+            
+    Raises:
+        ValueError: If no files match the tag criteria or if output directory creation fails.
+    """
+    build_date = build_date or datetime.date.today()
 
     # Get all markdown files and their modification times
     md_files = []
-    total_files = 0
-    for filename in os.listdir(markdown_folder):
-        if filename.endswith(".md"):
-            total_files += 1
-            filepath = os.path.join(markdown_folder, filename)
-            # Check file against tag criteria
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-                frontmatter = parse_frontmatter(content)
-                if frontmatter:
-                    tags = frontmatter.get('tags', [])
-                    if isinstance(tags, str):
-                        tags = [t.strip() for t in tags.split(',')]
-                    
-                    # Select files based on tag criteria
-                    tag_match = tag_name in tags
-                    if (tag_criteria == 'contains' and tag_match) or \
-                       (tag_criteria == 'does not contain' and not tag_match):
-                        mod_time = os.path.getmtime(filepath)
-                        md_files.append((filepath, mod_time))
+    content_hashes = {}
+    all_files = discover_markdown_files(markdown_folder, recursive, ignore_patterns, symlinks, scan_workers)
+    total_files = len(all_files)
+    for filepath, mod_time in all_files:
+        # Check file against tag criteria
+        with open(filepath, 'r', encoding='utf-8') as f:
+            content = f.read()
+            frontmatter = parse_frontmatter(content)
+            # Select files based on tag criteria
+            if matches_tag_criteria(frontmatter, tag_name, tag_criteria):
+                md_files.append((filepath, mod_time))
+                content_hashes[filepath] = note_hash(content, frontmatter)
 
     # If no files match the criteria, raise an exception
     if not md_files:
         raise ValueError(f"No files found that {tag_criteria} the tag '{tag_name}'")
 
     # Select files based on mode and number
+    # Notes with the same mtime, e.g. after a sync or checkout, are ordered by path
     if selection_mode == 'newest':
-        md_files.sort(key=lambda x: x[1], reverse=True)
+        md_files.sort(key=lambda x: (x[1], x[0]), reverse=True)
     elif selection_mode == 'oldest':
-        md_files.sort(key=lambda x: x[1])
+        md_files.sort(key=lambda x: (x[1], x[0]))
     elif selection_mode == 'random':
         import random
         random.shuffle(md_files)
@@ -445,58 +951,114 @@ def create_epub(markdown_folder, tag_name, output_path, tag_criteria='does not c
     if progress_callback:
         progress_callback(f"Found {len(md_files)} files to process out of {total_files} total files")
 
-    # Process selected files
-    processed_files = 0
-    for filepath, _ in md_files:
-        try:
-            chapter = create_chapter(filepath, book, tag_name, tag_criteria)
-            if chapter:
-                book.toc.append(chapter)
-                book.spine.append(chapter)
-                # Extract publication from frontmatter
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    frontmatter = parse_frontmatter(content)
-                    if frontmatter:
-                        url = frontmatter.get('source', '')
-                        publication = urlparse(url).netloc if url else "Unknown"
-                        if publication and publication != "Unknown":
-                            publications.append(publication)
-                
-            processed_files += 1
-            if progress_callback:
-                progress_callback(f"Processing file {processed_files} of {len(md_files)}: {os.path.basename(filepath)}")
-        except Exception as e:
-            print(f"Error processing {os.path.basename(filepath)}: {e}")
-            if progress_callback:
-                progress_callback(f"Error processing {os.path.basename(filepath)}: {str(e)}")
-
-    # Create and add cover
-    date_str = datetime.date.today().strftime('%B %d, %Y')
-    cover = create_cover(publications, date_str)
-    if cover:
-        book.add_item(cover)
-        book.set_cover("cover.jpg", cover.content)
+    # Skip the build if the output already holds the book for exactly these inputs
+    identifier = build_identifier(
+        [(os.path.relpath(filepath, markdown_folder), content_hashes[filepath]) for filepath, _ in md_files],
+        [tag_name, tag_criteria, cover_profile, build_date.isoformat()]
+    )
+    built_path = find_built_book(output_path, identifier)
+    if built_path:
         if progress_callback:
-            progress_callback("Added cover image")
+            progress_callback(f"{os.path.basename(built_path)} is already up to date")
+        return built_path
 
-    # Add navigation files
-    book.add_item(epub.EpubNcx())
-    book.add_item(epub.EpubNav())
+    output_path = prepare_output_path(output_path, progress_callback)
 
-    # Set the author
-    book.add_author("Articles")
+    book = new_book(build_date, identifier)
+
+    # Collect publications while processing files
+    publications = []
 
+    budget = MemoryBudget(memory_budget) if memory_budget else None
+    spool = Spool() if memory_budget else None
     try:
-        epub.write_epub(output_path, book, {})
-        if progress_callback:
-            progress_callback(f"Successfully created EPUB at {output_path}")
-        print(f"EPUB created successfully at {output_path}")
-    except Exception as e:
-        if progress_callback:
-            progress_callback(f"Error creating EPUB: {str(e)}")
-        print(f"Error creating EPUB: {e}")
-        raise
+        remaining = deque(filepath for filepath, _ in md_files)
+        processed_files = 0
+        archived = []
+        while remaining:
+            # Convert the next group of files, collecting the images of their chapters.
+            # Without a memory budget all selected files form a single group; with one,
+            # half of it is left for the images.
+            group = []
+            while remaining and not (budget and group and budget.exceeded(0.5)):
+                filepath = remaining.popleft()
+                try:
+                    with open(filepath, 'r', encoding='utf-8') as f:
+                        content = f.read()
+                    frontmatter = parse_frontmatter(content)
+                    if matches_tag_criteria(frontmatter, tag_name, tag_criteria):
+                        prepared = prepare_chapter(filepath, content, frontmatter)
+                        if budget:
+                            budget.acquire(len(prepared['html']))
+                        group.append((filepath, prepared))
+                except Exception as e:
+                    print(f"Error processing {os.path.basename(filepath)}: {e}")
+                    if progress_callback:
+                        progress_callback(f"Error processing {os.path.basename(filepath)}: {str(e)}")
+
+            # Fetch every image of the group in one scheduling pass
+            image_urls = [url for _, prepared in group for url in prepared['image_urls']]
+            if image_urls and progress_callback:
+                progress_callback(f"Fetching {len(set(image_urls))} images")
+            image_paths = fetch_images(
+                image_urls,
+                fetcher,
+                lambda internal_filename, image_data: add_image(book, internal_filename, image_data, spool),
+                budget
+            )
+
+            # Process selected files
+            for filepath, prepared in group:
+                try:
+                    rendered = finish_chapter(prepared, image_paths)
+                    chapter = add_rendered_chapter(book, rendered, spool)
+                    book.toc.append(chapter)
+                    book.spine.append(chapter)
+                    publication = rendered['publication']
+                    if publication and publication != "Unknown":
+                        publications.append(publication)
+                    archived.append(filepath)
+                        
+                    processed_files += 1
+                    if progress_callback:
+                        progress_callback(f"Processing file {processed_files} of {len(md_files)}: {os.path.basename(filepath)}")
+                except Exception as e:
+                    print(f"Error processing {os.path.basename(filepath)}: {e}")
+                    if progress_callback:
+                        progress_callback(f"Error processing {os.path.basename(filepath)}: {str(e)}")
+                finally:
+                    if budget:
+                        budget.release(len(prepared['html']))
+                    prepared['html'] = None
+
+        write_book(book, publications, output_path, progress_callback, cover_profile, build_date)
+
+        # Tag the notes once the book is written. Their modification times are restored,
+        # so the tag does not change which notes are newest and selecting them again
+        # gives the same book.
+        for filepath in archived:
+            try:
+                st = os.stat(filepath)
+                with open(filepath, 'r+', encoding='utf-8') as f:
+                    append_tag_to_frontmatter(f, "archive")
+                os.utime(filepath, ns=(st.st_atime_ns, st.st_mtime_ns))
+            except OSError as e:
+                print(f"Error tagging {os.path.basename(filepath)}: {e}")
+                if progress_callback:
+                    progress_callback(f"Error tagging {os.path.basename(filepath)}: {str(e)}")
+    finally:
+        if spool:
+            spool.cleanup()
+
+    if progress_callback:
+        if budget:
+            progress_callback(f"Peak in-flight data of this build: {budget.peak / 2**20:.1f} MB "
+                              f"(budget {budget.limit / 2**20:.0f} MB)")
+        # ru_maxrss covers the whole life of the process, including earlier builds
+        rss = peak_rss()
+        if rss:
+            progress_callback(f"Peak memory usage of this process: {rss / 2**20:.0f} MB")
+    return output_path
 
 if __name__ == "__main__":
     try:
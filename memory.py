@@ -0,0 +1,129 @@
+import os
+import sys
+import shutil
+import tempfile
+import threading
+from ebooklib import epub
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class MemoryBudget:
+    """Thread-safe count of the bytes a build currently holds in memory.
+
+    Producers add the size of data they load with acquire() and remove it with
+    release() once the data has been written to disk. Callers check exceeded()
+    before starting more work, which keeps the in-flight total near the limit.
+
+    Args:
+        limit (int): Budget in bytes.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self.peak = 0
+        self._reservations = 0
+        self._lock = threading.Lock()
+        self._room = threading.Condition(self._lock)
+
+    def acquire(self, size):
+        with self._lock:
+            self.used += size
+            self.peak = max(self.peak, self.used)
+
+    def release(self, size):
+        with self._lock:
+            self.used = max(0, self.used - size)
+            self._room.notify_all()
+
+    def reserve(self, size):
+        """Wait until ``size`` more bytes fit in the budget, then acquire them.
+
+        Only reservations are waited for, never plain acquisitions, so a reservation
+        goes ahead as soon as no other one is held, even if it alone exceeds the budget.
+        Release it with unreserve().
+        """
+        with self._room:
+            while self._reservations and self.used + size > self.limit:
+                self._room.wait()
+            self._reservations += 1
+            self.used += size
+            self.peak = max(self.peak, self.used)
+
+    def unreserve(self, size):
+        with self._room:
+            self._reservations -= 1
+            self.used = max(0, self.used - size)
+            self._room.notify_all()
+
+    def exceeded(self, fraction=1.0):
+        """Return True if more than ``fraction`` of the budget is in use."""
+        return self.used > self.limit * fraction
+
+
+class Spool:
+    """Temporary directory holding item content until the EPUB is written."""
+
+    def __init__(self):
+        self.path = tempfile.mkdtemp(prefix='obsidian2epub-')
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def write(self, data):
+        """Write data to a new spool file and return its path."""
+        with self._lock:
+            self._counter += 1
+            path = os.path.join(self.path, str(self._counter))
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def cleanup(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class _SpooledContent:
+    """Mixin that keeps an EPUB item's content on disk and reads it back when written."""
+
+    def __init__(self, spool, **kwargs):
+        self._spool = spool
+        self._spool_path = None
+        self._is_text = False
+        super().__init__(**kwargs)
+
+    @property
+    def content(self):
+        if self._spool_path is None:
+            return b''
+        with open(self._spool_path, 'rb') as f:
+            data = f.read()
+        return data.decode('utf-8') if self._is_text else data
+
+    @content.setter
+    def content(self, value):
+        self._is_text = isinstance(value, str)
+        self._spool_path = self._spool.write(value.encode('utf-8') if self._is_text else value)
+
+
+class SpooledEpubImage(_SpooledContent, epub.EpubImage):
+    """epub.EpubImage whose content lives in a Spool."""
+
+
+class SpooledEpubHtml(_SpooledContent, epub.EpubHtml):
+    """epub.EpubHtml whose content lives in a Spool."""
+
+
+def peak_rss():
+    """Return the peak resident set size of this process in bytes, or None if unknown.
+
+    The peak covers the whole life of the process, not just the current build.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak if sys.platform == 'darwin' else peak * 1024
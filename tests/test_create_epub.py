@@ -0,0 +1,90 @@
+import os
+import datetime
+
+from mdconverter import create_epub
+
+
+NOTE = """---
+title: "Note {n}: a title"
+author:
+  - "[[Jane Doe]]"
+source: https://example.com/{n}
+published: 2024-01-0{n}
+tags: [clippings]
+---
+Body of note {n}.
+"""
+
+BUILD_DATE = datetime.date(2024, 2, 1)
+
+
+def make_vault(root, mtime=None):
+    vault = root / "vault"
+    vault.mkdir()
+    for n in (1, 2, 3, 4):
+        note = vault / f"note{n}.md"
+        note.write_text(NOTE.format(n=n), encoding='utf-8')
+        if mtime:
+            os.utime(note, (mtime, mtime))
+    out = root / "out"
+    out.mkdir()
+    return vault, out
+
+
+def build(vault, out, messages):
+    return create_epub(str(vault), "mytag", str(out / "digest.epub"), tag_criteria='does not contain',
+                       progress_callback=messages.append, build_date=BUILD_DATE)
+
+
+def test_building_twice_is_a_no_op(tmp_path):
+    vault, out = make_vault(tmp_path)
+    messages = []
+    first = build(vault, out, messages)
+    data = (out / "digest.epub").read_bytes()
+
+    # The first build tagged the notes as archived, which does not change the book
+    assert "archive" in (vault / "note1.md").read_text(encoding='utf-8')
+    messages.clear()
+    second = build(vault, out, messages)
+
+    assert second == first
+    assert "digest.epub is already up to date" in messages
+    assert sorted(p.name for p in out.iterdir()) == ["digest.epub"]
+    assert (out / "digest.epub").read_bytes() == data
+
+
+def test_building_twice_with_tied_mtimes_is_a_no_op(tmp_path):
+    # Synced or checked out notes often share their modification time
+    vault, out = make_vault(tmp_path, mtime=1_000_000)
+    first = build(vault, out, [])
+
+    # Tagging leaves the notes' modification times alone
+    assert os.path.getmtime(vault / "note1.md") == 1_000_000
+    messages = []
+    second = build(vault, out, messages)
+
+    assert second == first
+    assert "digest.epub is already up to date" in messages
+    assert sorted(p.name for p in out.iterdir()) == ["digest.epub"]
+
+
+def test_editing_a_note_rebuilds(tmp_path):
+    vault, out = make_vault(tmp_path)
+    first = build(vault, out, [])
+
+    note = vault / "note2.md"
+    note.write_text(note.read_text(encoding='utf-8') + "\nAn added paragraph.\n", encoding='utf-8')
+    messages = []
+    second = build(vault, out, messages)
+
+    assert second != first
+    assert "digest.epub is already up to date" not in messages
+    assert len(list(out.iterdir())) == 2
+
+    # The rebuilt book went to a timestamped copy, which later builds find
+    messages = []
+    third = build(vault, out, messages)
+
+    assert third == second
+    assert f"{os.path.basename(second)} is already up to date" in messages
+    assert len(list(out.iterdir())) == 2
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+import mdconverter
+from mdconverter import discover_markdown_files
+
+
+_scandir = os.scandir
+
+
+class _WindowsEntry:
+    """DirEntry stand-in whose stat() lacks inode numbers, like on Windows."""
+
+    def __init__(self, entry):
+        self._entry = entry
+        self.name = entry.name
+        self.path = entry.path
+
+    def is_symlink(self):
+        return self._entry.is_symlink()
+
+    def is_dir(self):
+        return self._entry.is_dir()
+
+    def is_file(self):
+        return self._entry.is_file()
+
+    def stat(self):
+        st = list(self._entry.stat())
+        st[1] = st[2] = 0  # st_ino, st_dev
+        return os.stat_result(st)
+
+
+class _WindowsScandir:
+    def __init__(self, path):
+        self._entries = _scandir(path)
+
+    def __enter__(self):
+        return (_WindowsEntry(entry) for entry in self._entries)
+
+    def __exit__(self, *exc):
+        self._entries.close()
+
+
+def make_vault(root):
+    for folder in ("a", "b", "c/d"):
+        os.makedirs(root / folder)
+        (root / folder / "note.md").write_text("---\ntitle: Note\n---\n")
+    (root / "top.md").write_text("---\ntitle: Top\n---\n")
+
+
+@pytest.mark.parametrize('symlinks', ['none', 'files', 'all'])
+def test_all_subfolders_are_scanned_without_inode_numbers(tmp_path, monkeypatch, symlinks):
+    make_vault(tmp_path)
+    monkeypatch.setattr(mdconverter.os, 'scandir', _WindowsScandir)
+
+    found = [os.path.relpath(path, tmp_path) for path, _ in
+             discover_markdown_files(str(tmp_path), symlinks=symlinks)]
+    assert found == sorted(os.path.join(*p.split('/')) for p in
+                           ("a/note.md", "b/note.md", "c/d/note.md", "top.md"))
+
+
+@pytest.mark.skipif(not hasattr(os, 'symlink'), reason="symlinks unsupported")
+def test_symlinked_folder_cycles_are_scanned_once(tmp_path):
+    make_vault(tmp_path)
+    try:
+        os.symlink(tmp_path, tmp_path / "c" / "loop", target_is_directory=True)
+    except OSError:
+        pytest.skip("cannot create symlinks")
+
+    found = discover_markdown_files(str(tmp_path), symlinks='all')
+    assert len(found) == 4
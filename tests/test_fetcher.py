@@ -0,0 +1,107 @@
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from fetcher import FetchEngine
+
+
+BODY = b"x" * 1000
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Serves scripted responses: each path answers with the next step of its script."""
+
+    scripts = {}
+    hits = {}
+
+    def do_GET(self):
+        hits = self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        script = self.scripts[self.path]
+        step = script[min(hits, len(script)) - 1]
+
+        if step == 'reset':
+            # Promise the whole body, send a few bytes and drop the connection
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY[:10])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+
+        status, headers = step if isinstance(step, tuple) else (step, {})
+        body = BODY if status == 200 else b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.scripts = {}
+    Handler.hits = {}
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def engine(**kwargs):
+    options = dict(retries=2, backoff=0.01, max_backoff=2.0, timeout=5.0)
+    options.update(kwargs)
+    return FetchEngine(**options)
+
+
+def test_retries_server_errors(server):
+    Handler.scripts['/flaky'] = [503, 200]
+    assert engine().fetch(f"{server}/flaky") == BODY
+    assert Handler.hits['/flaky'] == 2
+
+
+def test_does_not_retry_client_errors(server):
+    Handler.scripts['/missing'] = [404, 200]
+    assert engine().fetch(f"{server}/missing") is None
+    assert Handler.hits['/missing'] == 1
+
+
+def test_retries_connection_reset_mid_body(server):
+    Handler.scripts['/reset'] = ['reset', 200]
+    assert engine().fetch(f"{server}/reset") == BODY
+    assert Handler.hits['/reset'] == 2
+
+
+def test_honours_retry_after(server):
+    Handler.scripts['/throttled'] = [(429, {'Retry-After': '1'}), 200]
+    start = time.monotonic()
+    assert engine().fetch(f"{server}/throttled") == BODY
+    assert time.monotonic() - start >= 1
+    assert Handler.hits['/throttled'] == 2
+
+
+def test_gives_up_after_retries(server):
+    Handler.scripts['/down'] = [503]
+    assert engine(retries=2).fetch(f"{server}/down") is None
+    assert Handler.hits['/down'] == 3
+
+
+def test_on_result_runs_off_the_event_loop(server):
+    Handler.scripts['/a'] = [200]
+    Handler.scripts['/b'] = [200]
+    threads = {}
+
+    def on_result(url, data):
+        threads[url] = threading.current_thread()
+
+    results = engine().fetch_all([f"{server}/a", f"{server}/b"], on_result)
+    assert results == {f"{server}/a": True, f"{server}/b": True}
+    assert threading.main_thread() not in threads.values()
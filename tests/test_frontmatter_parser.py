@@ -0,0 +1,81 @@
+import yaml
+import pytest
+
+from frontmatter_parser import YAML_LOADER, parse_simple, load_frontmatter
+
+
+# Frontmatter as written by the Obsidian Web Clipper
+CLIPPING = '''title: "How Things Work: A Guide"
+source: "https://example.com/a?b=1"
+author:
+  - "[[Jane Doe]]"
+  - "[[John Roe]]"
+published: 2024-01-02
+created: 2024-03-04
+description: "It's a long description, with commas"
+tags:
+  - "clippings"'''
+
+# Scalars covering plain, quoted and flow values and every implicit type
+VALUES = [
+    'plain', 'yes', 'No', 'ON', 'null', '~', 'Null', '', '5', '-3', '0o7', '012', '0x1F', '1_000',
+    '1.5', '.inf', '1e3', '2024-01-02', '2024-1-2', '2024-01-02T10:00:00Z', '10:30', "'single'",
+    "'it''s'", "'bad'quote'", '"dq"', '"a\\nb"', '"a"b"', '[a, b]', '[]', '["x, y"]', '[[x]]',
+    '[a, [b]]', '{a: 1}', 'a: b', 'a #c', 'a#b', 'http://x.com/a:b', 'foo:', '"[[Jane]]"', '[[Jane]]',
+    "Don't stop", '- x', '!tag x', '&a x', '*a', '%x', '@x', '`x', '<<', '=', 'a, b', '  spaced  ',
+    '[a, b,]', '[ a , "b" ]', 'true', 'False', 'y', 'n', '2024-01-02 ', '+1', '.5', '1:20', 'élan',
+    '"é"', '日本',
+]
+
+DOCUMENTS = [
+    CLIPPING, '', '# only comment', 'tags: a, b', 'tags: [a, b]', 'tags:\n- a\n- b',
+    'tags:\n  - a\n   - b', 'tags:\n  - a\n  - b\nx: 1', 'author: Jane Doe', 'author:\n  - Jane Doe',
+    'a: b\n  c', 'a:\n  b: c', 'a: 1\na: 2', 'yes: 1', 'a b: c', 'a-b: c', 'a: b\n\n\nc: d',
+    'a: [x]\n  - y', 'a:\n', 'a:\n  -', 'a:\n  - [x]', 'a:\n  - "x"\n  # comment\n  - y', 'a: "x" # c',
+    'a:\tb', 'just a string', '- list', 'a: b\r\nc: d', '---', 'a: |\n  x',
+    # Spaces before the colon of a key
+    'title : Foo', 'title  :  Foo', 'a b : c', 'tags :\n  - a', 'k :', 'k :x', ' k: v', 'k : [a, b]',
+]
+DOCUMENTS += [f'k: {v}' for v in VALUES] + [f'k:\n  - {v}' for v in VALUES if v]
+
+# libyaml accepts a tab after a key's colon where the pure-Python parser raises
+LIBYAML_LENIENT = {'a:\tb'}
+
+
+def typed(value):
+    """Return value with the type of every scalar attached, so 1 != True != 1.0."""
+    if isinstance(value, dict):
+        return {k: typed(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [typed(v) for v in value]
+    return (type(value), value)
+
+
+def safe_load(text):
+    try:
+        return typed(yaml.safe_load(text))
+    except yaml.YAMLError:
+        return 'error'
+
+
+@pytest.mark.parametrize('text', DOCUMENTS)
+def test_fast_path_matches_safe_load(text):
+    data = parse_simple(text)
+    if data is not None:
+        assert typed(data) == safe_load(text)
+
+
+@pytest.mark.parametrize('text', DOCUMENTS)
+def test_load_frontmatter_matches_safe_load(text):
+    if text in LIBYAML_LENIENT and YAML_LOADER is not yaml.SafeLoader:
+        pytest.skip("libyaml is more lenient than yaml.safe_load here")
+    try:
+        data = typed(load_frontmatter(text))
+    except yaml.YAMLError:
+        data = 'error'
+    assert data == safe_load(text)
+
+
+@pytest.mark.parametrize('text', [CLIPPING, 'title : Foo', 'tags: [a, b]', 'author:\n  - Jane Doe'])
+def test_clipper_frontmatter_takes_the_fast_path(text):
+    assert parse_simple(text) is not None
@@ -0,0 +1,33 @@
+from io import BytesIO
+
+from PIL import Image
+
+from memory import MemoryBudget
+from mdconverter import optimize_image
+
+
+def png(width, height):
+    data = BytesIO()
+    Image.new("RGBA", (width, height), (200, 100, 50, 255)).save(data, format='PNG')
+    return data.getvalue()
+
+
+def test_decoded_pixels_count_against_the_budget():
+    data = png(1600, 1200)
+    budget = MemoryBudget(64 * 2**20)
+
+    internal_filename, jpeg = optimize_image("https://example.com/photo.png", data, budget)
+
+    assert internal_filename.startswith("images/") and internal_filename.endswith(".jpg")
+    assert Image.open(BytesIO(jpeg)).size == (768, 576)
+    # The encoded PNG is tiny, the decoded pixels are not
+    assert budget.peak >= 1600 * 1200 * 3 > len(data)
+    assert budget.used == 0
+
+
+def test_budget_is_released_when_processing_fails():
+    budget = MemoryBudget(64 * 2**20)
+    data = png(100, 100)[:200]  # Valid header, truncated pixels
+
+    assert optimize_image("https://example.com/broken.png", data, budget) is None
+    assert budget.used == 0
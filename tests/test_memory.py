@@ -0,0 +1,32 @@
+import threading
+
+from memory import MemoryBudget
+
+
+def test_reservation_larger_than_the_budget_goes_ahead_alone():
+    budget = MemoryBudget(100)
+    budget.acquire(80)
+    budget.reserve(500)
+    assert budget.used == 580
+    budget.unreserve(500)
+    assert budget.used == 80
+
+
+def test_reservation_waits_for_room_while_another_is_held():
+    budget = MemoryBudget(100)
+    budget.reserve(60)
+    reserved = threading.Event()
+
+    def reserve():
+        budget.reserve(60)
+        reserved.set()
+
+    thread = threading.Thread(target=reserve)
+    thread.start()
+    assert not reserved.wait(0.1)
+
+    budget.unreserve(60)
+    assert reserved.wait(5)
+    thread.join()
+    assert budget.used == 60
+    assert budget.peak == 60
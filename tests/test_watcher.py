@@ -0,0 +1,109 @@
+import os
+import threading
+
+import watcher
+from watcher import VaultWatcher
+
+
+NOTE = """---
+title: {title}
+source: https://example.com/article
+tags: [clipping]
+---
+Body of {title}.
+"""
+
+
+def write_note(path, title, mtime):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(NOTE.format(title=title))
+    os.utime(path, (mtime, mtime))
+
+
+def test_note_changed_while_rendering_is_rendered_again(tmp_path, monkeypatch):
+    note = str(tmp_path / "note.md")
+    write_note(note, "First", 1_000_000)
+
+    started = threading.Event()
+    release = threading.Event()
+    render_chapter = watcher.render_chapter
+
+    def slow_render(filepath, content, frontmatter, fetcher=None):
+        started.set()
+        release.wait(5)
+        return render_chapter(filepath, content, frontmatter, fetcher)
+
+    monkeypatch.setattr(watcher, 'render_chapter', slow_render)
+    vault = VaultWatcher(str(tmp_path), "archive", str(tmp_path / "out.epub"), render_workers=1)
+    try:
+        assert vault.scan() == 1
+        assert started.wait(5)
+
+        # The note changes while its previous version is being rendered
+        write_note(note, "Second", 2_000_000)
+        assert vault.scan() == 0
+        release.set()
+        vault._executor.submit(lambda: None).result()
+        assert note not in vault.rendered
+
+        # The stale render is dropped and the next scan queues the new version
+        assert vault.scan() == 1
+        vault._executor.submit(lambda: None).result()
+        mtime, rendered = vault.rendered[note]
+        assert mtime == 2_000_000
+        assert "Second" in rendered['title']
+    finally:
+        release.set()
+        vault.stop()
+
+
+def test_note_without_mapping_frontmatter_does_not_stop_watching(tmp_path):
+    (tmp_path / "divider.md").write_text("---\nJust a divider line\n---\nBody.\n", encoding='utf-8')
+    write_note(str(tmp_path / "note.md"), "Note", 1_000_000)
+
+    messages = []
+    vault = VaultWatcher(str(tmp_path), "archive", str(tmp_path / "out.epub"),
+                         poll_interval=0.05, progress_callback=messages.append)
+    try:
+        assert vault.scan() == 1
+        assert str(tmp_path / "divider.md") in vault.index
+
+        vault.start()
+        vault._stop.wait(0.2)
+        assert vault._thread.is_alive()
+    finally:
+        vault.stop()
+
+
+def test_watcher_keeps_running_when_a_scan_fails(tmp_path, monkeypatch):
+    messages = []
+    vault = VaultWatcher(str(tmp_path), "archive", str(tmp_path / "out.epub"),
+                         poll_interval=0.05, progress_callback=messages.append)
+
+    def broken_scan():
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(vault, 'scan', broken_scan)
+    try:
+        vault.start()
+        vault._stop.wait(0.2)
+        assert vault._thread.is_alive()
+        assert f"Error scanning {tmp_path}: boom" in messages
+    finally:
+        vault.stop()
+
+
+def test_watcher_can_be_restarted(tmp_path):
+    vault = VaultWatcher(str(tmp_path), "archive", str(tmp_path / "out.epub"), poll_interval=0.05)
+    vault.start()
+    vault.stop()
+
+    write_note(str(tmp_path / "note.md"), "Note", 1_000_000)
+    try:
+        vault.start()
+        vault._stop.wait(0.2)
+        assert vault._thread.is_alive()
+        vault._executor.submit(lambda: None).result()
+        assert str(tmp_path / "note.md") in vault.rendered
+    finally:
+        vault.stop()
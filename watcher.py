@@ -0,0 +1,278 @@
+import os
+import time
+import datetime
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fetcher import FetchEngine
+
+from mdconverter import (
+    discover_markdown_files,
+    parse_frontmatter,
+    append_tag_to_frontmatter,
+    matches_tag_criteria,
+    render_chapter,
+    add_rendered_chapter,
+    new_book,
+    build_identifier,
+    prepare_output_path,
+    write_book,
+)
+
+
+class VaultWatcher:
+    """Keep a continuously-updated digest of an Obsidian vault.
+
+    The watcher polls the markdown folder for changed ``.md`` files and keeps an index
+    of their frontmatter. Notes that match the tag criteria are rendered in the
+    background as soon as they appear, so building the EPUB only has to assemble
+    chapters that are already rendered. A book is written when build() is called, or
+    automatically once ``batch_size`` new notes are ready.
+
+    Args:
+        markdown_folder (str): Path to folder containing markdown files.
+        tag_name (str): Tag to filter files by.
+        output_path (str): Path to save the EPUB file.
+        tag_criteria (str, optional): How to filter by tag - 'contains' or 'does not contain'.
+            Defaults to 'does not contain'.
+        batch_size (int, optional): Build automatically once this many notes are rendered.
+            If None, books are only built on demand.
+        poll_interval (float, optional): Seconds between folder scans. Defaults to 2.
+        render_workers (int, optional): Number of background rendering threads. Defaults to 2.
+        progress_callback (callable, optional): Function to call with progress updates.
+        recursive (bool, optional): Also watch subfolders. Defaults to True.
+        ignore_patterns (iterable, optional): Glob patterns of files and folders to skip.
+            Defaults to mdconverter.DEFAULT_IGNORE_PATTERNS.
+        symlinks (str, optional): Symlink policy - 'none', 'files' or 'all'. Defaults to 'files'.
+        cover_profile (str, optional): Device profile of the cover, see cover.COVER_PROFILES.
+            Defaults to 'kindle'.
+        fetcher (FetchEngine, optional): Engine used to download images. Shared by all
+            background renders so its per-host rate limits apply to the whole vault.
+    """
+
+    def __init__(self, markdown_folder, tag_name, output_path, tag_criteria='does not contain',
+                 batch_size=None, poll_interval=2.0, render_workers=2, progress_callback=None,
+                 recursive=True, ignore_patterns=None, symlinks='files', cover_profile='kindle',
+                 fetcher=None):
+        self.markdown_folder = markdown_folder
+        self.tag_name = tag_name
+        self.output_path = output_path
+        self.tag_criteria = tag_criteria
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.progress_callback = progress_callback
+        self.recursive = recursive
+        self.ignore_patterns = ignore_patterns
+        self.symlinks = symlinks
+        self.cover_profile = cover_profile
+        self.fetcher = fetcher or FetchEngine()
+
+        # filepath -> (mtime, frontmatter) for every markdown file in the folder
+        self.index = {}
+        # filepath -> (mtime, rendered chapter) for matching notes ready to ship
+        self.rendered = {}
+        # filepath -> mtime of notes already shipped, so tagging them does not re-queue them
+        self.shipped = {}
+
+        self._pending = set()
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.render_workers = render_workers
+        self._executor = ThreadPoolExecutor(max_workers=render_workers)
+
+    def _report(self, message):
+        print(message)
+        if self.progress_callback:
+            self.progress_callback(message)
+
+    def _list_files(self):
+        """Return {filepath: mtime} for the markdown files in the folder."""
+        return dict(discover_markdown_files(
+            self.markdown_folder,
+            recursive=self.recursive,
+            ignore_patterns=self.ignore_patterns,
+            symlinks=self.symlinks
+        ))
+
+    def scan(self):
+        """Update the frontmatter index and queue new or changed matching notes for rendering.
+
+        Returns:
+            int: Number of notes queued for rendering.
+        """
+        files = self._list_files()
+        queued = 0
+        with self._lock:
+            for filepath in set(self.index) - set(files):
+                self.index.pop(filepath, None)
+                self.rendered.pop(filepath, None)
+                self.shipped.pop(filepath, None)
+
+            for filepath, mtime in files.items():
+                indexed = self.index.get(filepath)
+                if indexed and indexed[0] == mtime:
+                    continue
+                try:
+                    queued += self._index_file(filepath, mtime)
+                except (OSError, UnicodeDecodeError) as e:
+                    # Retried on the next scan, e.g. once a synced file has downloaded
+                    print(f"Error reading {os.path.basename(filepath)}: {e}")
+                except Exception as e:
+                    # Not retried until the note changes again
+                    self.index[filepath] = (mtime, None)
+                    self._report(f"Error processing {os.path.basename(filepath)}: {str(e)}")
+        return queued
+
+    def _index_file(self, filepath, mtime):
+        """Index one new or changed note and queue it for rendering if it matches.
+
+        Returns:
+            int: 1 if the note was queued, else 0.
+        """
+        with open(filepath, 'r', encoding='utf-8') as f:
+            content = f.read()
+        frontmatter = parse_frontmatter(content)
+        self.index[filepath] = (mtime, frontmatter)
+        self.rendered.pop(filepath, None)
+
+        if self.shipped.get(filepath) == mtime:
+            return 0
+        if matches_tag_criteria(frontmatter, self.tag_name, self.tag_criteria) \
+                and filepath not in self._pending:
+            self._pending.add(filepath)
+            self._executor.submit(self._render, filepath, mtime, content, frontmatter)
+            return 1
+        return 0
+
+    def _render(self, filepath, mtime, content, frontmatter):
+        try:
+            rendered = render_chapter(filepath, content, frontmatter, self.fetcher)
+        except Exception as e:
+            self._report(f"Error processing {os.path.basename(filepath)}: {str(e)}")
+            rendered = None
+        finally:
+            with self._lock:
+                self._pending.discard(filepath)
+
+        if rendered is None:
+            return
+        with self._lock:
+            # Drop the render if the note changed while it was being rendered. scan() did
+            # not queue the new version because this one was pending, so forget the
+            # index entry to have the next scan read and queue the note again.
+            indexed = self.index.get(filepath)
+            if not indexed or indexed[0] != mtime:
+                self.index.pop(filepath, None)
+                return
+            self.rendered[filepath] = (mtime, rendered)
+            ready = len(self.rendered)
+        self._report(f"Pre-rendered {os.path.basename(filepath)} ({ready} ready)")
+
+        if self.batch_size and ready >= self.batch_size:
+            self.build()
+
+    def build(self):
+        """Write an EPUB from the notes rendered so far and tag them as archived.
+
+        Returns:
+            str: Path of the written EPUB, or None if no notes were ready.
+        """
+        with self._lock:
+            if not self.rendered:
+                return None
+            # Newest notes first, matching create_epub's default selection mode
+            ready = sorted(self.rendered.items(), key=lambda x: x[1][0], reverse=True)
+
+            # Chapter file names are content hashes, so they identify the book's contents
+            identifier = build_identifier(
+                [(os.path.relpath(filepath, self.markdown_folder), rendered['file_name'])
+                 for filepath, (_, rendered) in ready],
+                [self.tag_name, self.tag_criteria, self.cover_profile, datetime.date.today().isoformat()]
+            )
+            book = new_book(identifier=identifier)
+            publications = []
+            for _, (_, rendered) in ready:
+                chapter = add_rendered_chapter(book, rendered)
+                book.toc.append(chapter)
+                book.spine.append(chapter)
+                if rendered['publication'] != "Unknown":
+                    publications.append(rendered['publication'])
+
+            output_path = prepare_output_path(self.output_path, self.progress_callback)
+            write_book(book, publications, output_path, self.progress_callback, self.cover_profile)
+
+            for filepath, _ in ready:
+                self.rendered.pop(filepath, None)
+                try:
+                    with open(filepath, 'r+', encoding='utf-8') as f:
+                        append_tag_to_frontmatter(f, "archive")
+                    self.shipped[filepath] = os.path.getmtime(filepath)
+                except OSError as e:
+                    print(f"Error tagging {os.path.basename(filepath)}: {e}")
+            return output_path
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.scan()
+            except Exception as e:
+                # Keep watching; the next scan may well succeed
+                self._report(f"Error scanning {self.markdown_folder}: {str(e)}")
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Start watching the folder in a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._report(f"Watching {self.markdown_folder}")
+
+    def stop(self):
+        """Stop watching and wait for in-progress renders to finish."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self._executor.shutdown(wait=True)
+        # A fresh pool lets the watcher be started again
+        self._executor = ThreadPoolExecutor(max_workers=self.render_workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch an Obsidian folder and build EPUB digests from new notes.")
+    parser.add_argument("markdown_folder", help="Folder containing markdown files")
+    parser.add_argument("output_path", help="Path to save the EPUB file")
+    parser.add_argument("--tag", default="archive", help="Tag to filter files by")
+    parser.add_argument("--criteria", default="does not contain", choices=["contains", "does not contain"])
+    parser.add_argument("--batch-size", type=int, default=10, help="Build once this many notes are ready")
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds between folder scans")
+    parser.add_argument("--no-recursive", action="store_true", help="Only watch the top-level folder")
+    parser.add_argument("--ignore", action="append", help="Glob pattern of files or folders to skip (repeatable)")
+    args = parser.parse_args()
+
+    watcher = VaultWatcher(
+        args.markdown_folder,
+        args.tag,
+        args.output_path,
+        tag_criteria=args.criteria,
+        batch_size=args.batch_size,
+        poll_interval=args.interval,
+        recursive=not args.no_recursive,
+        ignore_patterns=args.ignore
+    )
+    watcher.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        # Ship whatever is ready before exiting
+        watcher.stop()
+        watcher.build()
+
+
+if __name__ == "__main__":
+    main()